@@ -2,28 +2,134 @@
 FloodLoop — Database Layer
 SQLAlchemy + SQLite (zero-config, file-based)
 Upgrade to PostgreSQL by changing DATABASE_URL in .env
+(pool sizing via DB_POOL_SIZE / DB_POOL_OVERFLOW). On psycopg2 the engine
+batches executemany() itself, so bulk_save_objects() is never needed.
 """
 
+import asyncio
+import csv
+import enum
+import hashlib
+import io
+import logging
 import os
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import List, Optional
 from sqlalchemy import (
-    create_engine, Column, Integer, Float, String,
-    DateTime, Boolean, Text, ForeignKey
+    bindparam, create_engine, event, func, insert, inspect, make_url, select, text, update,
+    MetaData, Table, Integer, SmallInteger, Float, String, DateTime, Boolean, LargeBinary, CheckConstraint,
+    ForeignKey, Index, TypeDecorator,
 )
-from sqlalchemy.orm import declarative_base, sessionmaker, relationship
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import (
+    DeclarativeBase, Mapped, mapped_column, sessionmaker, scoped_session,
+    relationship, selectinload, validates,
+)
+from sqlalchemy.pool import StaticPool
 from dotenv import load_dotenv
 
 load_dotenv()
 
+log = logging.getLogger("floodloop.db")
+
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./floodloop.db")
+DB_POOL_SIZE     = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_POOL_OVERFLOW = int(os.getenv("DB_POOL_OVERFLOW", "20"))
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
-)
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+if IS_SQLITE:
+    # File DBs keep SQLAlchemy's QueuePool (one connection per thread in use);
+    # an in-memory DB only exists on a single connection, so pin it.
+    in_memory = DATABASE_URL in ("sqlite://", "sqlite:///:memory:")
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool if in_memory else None,
+    )
+else:
+    # psycopg2: INSERTs are batched into multi-VALUES statements and other
+    # executemany() calls go through execute_batch, so plain add_all() /
+    # insert(Model) with a list of rows is already the bulk path.
+    psycopg2_opts = dict(
+        executemany_mode="values_plus_batch",
+        insertmanyvalues_page_size=1000,
+        executemany_batch_page_size=500,
+    ) if make_url(DATABASE_URL).get_driver_name() == "psycopg2" else {}
+    engine = create_engine(
+        DATABASE_URL,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_POOL_OVERFLOW,
+        pool_recycle=1800,
+        pool_pre_ping=True,
+        **psycopg2_opts,
+    )
+
+if IS_SQLITE:
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_conn, _):
+        # WAL lets readers run alongside the writer; NORMAL sync is still
+        # crash-safe under WAL but skips the fsync on every commit.
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA foreign_keys=ON")   # needed for ON DELETE CASCADE
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        cur.execute("PRAGMA mmap_size=268435456")
+        cur.execute("PRAGMA cache_size=-65536")
+        cur.close()
+
+# expire_on_commit=False: objects stay readable after commit() without a
+# reload SELECT per attribute (and after the session closes). Call
+# db.refresh() explicitly when a row may have changed underneath.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Task-local sessions for read-only endpoints (see get_db_ro).
+ScopedSession = scoped_session(SessionLocal, scopefunc=asyncio.current_task)
+
+
+class Base(DeclarativeBase):
+    # Fetch server-generated values (created_at, recorded_at, …) with
+    # RETURNING in the INSERT itself rather than a follow-up SELECT.
+    __mapper_args__ = {"eager_defaults": True}
+
+
+# ─── Column Types ──────────────────────────────────────────────────────────
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+class FloodLevel(enum.IntEnum):
+    LOW    = 0
+    MEDIUM = 1
+    HIGH   = 2
+
+
+class FloodLevelType(TypeDecorator):
+    """Stores a flood level as a SMALLINT; reads and writes its name ("HIGH")."""
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, FloodLevel):
+            return value
+        return FloodLevel[value]
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, str):   # pre-enum rows
+            return value
+        return FloodLevel(value).name
+
+
+def _score_x100(score: Optional[float]) -> Optional[int]:
+    return None if score is None else round(score * 100)
+
+
+# Server-side "now" for created_at-style defaults. SQLite's CURRENT_TIMESTAMP
+# only has 1 s resolution; strftime('%f') keeps milliseconds.
+SERVER_NOW = text("(strftime('%Y-%m-%d %H:%M:%f', 'now'))") if IS_SQLITE else func.now()
+
+
+# Single-precision float (REAL). Sensor readings carry ~0.1 resolution, so
+# 4 bytes is plenty and keeps the high-volume weather_logs rows narrow.
+Real32 = Float(precision=24)
 
 
 # ─── Models ────────────────────────────────────────────────────────────────
@@ -32,91 +138,418 @@ class City(Base):
     """Saved/favourite cities."""
     __tablename__ = "cities"
 
-    id          = Column(Integer, primary_key=True, index=True)
-    name        = Column(String(100), nullable=False)
-    country     = Column(String(10), nullable=False)
-    state       = Column(String(100), default="")
-    lat         = Column(Float, nullable=False)
-    lon         = Column(Float, nullable=False)
-    created_at  = Column(DateTime, default=datetime.utcnow)
-    is_favorite = Column(Boolean, default=False)
+    id:          Mapped[int]                = mapped_column(Integer, primary_key=True)
+    name:        Mapped[str]                = mapped_column(String(100))
+    country:     Mapped[str]                = mapped_column(String(10))
+    state:       Mapped[Optional[str]]      = mapped_column(String(100), default="")
+    lat:         Mapped[float]              = mapped_column(Float)
+    lon:         Mapped[float]              = mapped_column(Float)
+    created_at:  Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=SERVER_NOW)
+    is_favorite: Mapped[Optional[bool]]     = mapped_column(Boolean, default=False)
 
-    weather_logs = relationship("WeatherLog", back_populates="city", cascade="all, delete")
-    alerts       = relationship("Alert", back_populates="city", cascade="all, delete")
+    # Relationships never load implicitly (raise_on_sql) — use selectinload(),
+    # see cities_with_logs(). Deletes cascade in the database, not the session.
+    weather_logs: Mapped[List["WeatherLog"]] = relationship(
+        back_populates="city", cascade="all, delete", passive_deletes=True, lazy="raise_on_sql")
+    alerts:       Mapped[List["Alert"]]      = relationship(
+        back_populates="city", cascade="all, delete", passive_deletes=True, lazy="raise_on_sql")
 
 
 class WeatherLog(Base):
     """Historical weather + flood risk snapshots."""
     __tablename__ = "weather_logs"
+    __table_args__ = (
+        # "latest N snapshots for city X" — seek on city, walk time backwards
+        Index("ix_weather_logs_city_recorded", "city_id", "recorded_at", postgresql_concurrently=True),
+        # admin stats count HIGH-risk snapshots
+        Index("ix_weather_logs_level_time", "flood_level", "recorded_at", postgresql_concurrently=True),
+        CheckConstraint("flood_score_x100 BETWEEN 0 AND 10000", name="ck_flood_score_range"),
+    )
+
+    id:          Mapped[int]                = mapped_column(Integer, primary_key=True)
+    city_id:     Mapped[int]                = mapped_column(Integer, ForeignKey("cities.id", ondelete="CASCADE"))
+    recorded_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=SERVER_NOW)
 
-    id          = Column(Integer, primary_key=True, index=True)
-    city_id     = Column(Integer, ForeignKey("cities.id"), nullable=False)
-    recorded_at = Column(DateTime, default=datetime.utcnow, index=True)
+    temperature: Mapped[Optional[float]]    = mapped_column(Real32)
+    feels_like:  Mapped[Optional[float]]    = mapped_column(Real32)
+    humidity:    Mapped[Optional[float]]    = mapped_column(Real32)
+    pressure:    Mapped[Optional[float]]    = mapped_column(Real32)
+    wind_speed:  Mapped[Optional[float]]    = mapped_column(Real32)
+    wind_deg:    Mapped[Optional[float]]    = mapped_column(Real32)
+    clouds:      Mapped[Optional[float]]    = mapped_column(Real32)
+    rain_1h:     Mapped[Optional[float]]    = mapped_column(Real32, default=0)
+    rain_3h:     Mapped[Optional[float]]    = mapped_column(Real32, default=0)
+    description: Mapped[Optional[str]]      = mapped_column(String(200))
+    icon:        Mapped[Optional[str]]      = mapped_column(String(20))
 
-    temperature = Column(Float)
-    feels_like  = Column(Float)
-    humidity    = Column(Float)
-    pressure    = Column(Float)
-    wind_speed  = Column(Float)
-    wind_deg    = Column(Float)
-    clouds      = Column(Float)
-    rain_1h     = Column(Float, default=0)
-    rain_3h     = Column(Float, default=0)
-    description = Column(String(200))
-    icon        = Column(String(20))
+    flood_score_x100: Mapped[Optional[int]] = mapped_column(SmallInteger)   # 0–10000, see flood_score
+    flood_level: Mapped[Optional[str]]      = mapped_column(FloodLevelType)   # LOW | MEDIUM | HIGH
 
-    flood_score = Column(Float)
-    flood_level = Column(String(10))   # LOW | MEDIUM | HIGH
+    city: Mapped["City"] = relationship(back_populates="weather_logs", lazy="raise_on_sql")
 
-    city = relationship("City", back_populates="weather_logs")
+    @hybrid_property
+    def flood_score(self) -> Optional[float]:
+        """0–100 risk score, stored as a scaled SMALLINT (flood_score_x100)."""
+        return None if self.flood_score_x100 is None else self.flood_score_x100 / 100.0
+
+    @flood_score.inplace.setter
+    def _flood_score_setter(self, value: Optional[float]):
+        self.flood_score_x100 = _score_x100(value)
+
+    @flood_score.inplace.expression
+    @classmethod
+    def _flood_score_expression(cls):
+        return cls.flood_score_x100 / 100.0
 
 
 class SearchHistory(Base):
     """Every city search performed."""
     __tablename__ = "search_history"
+    __table_args__ = (
+        # repeat-search / "recent searches starting with …" lookups
+        Index("ix_search_history_qn_time", "query_norm", "searched_at", postgresql_concurrently=True),
+    )
+
+    id:          Mapped[int]                = mapped_column(Integer, primary_key=True)
+    query:       Mapped[str]                = mapped_column(String(200))
+    query_norm:  Mapped[Optional[str]]      = mapped_column(String(200))   # stripped + lowercased query
+    resolved_to: Mapped[Optional[str]]      = mapped_column(String(200))   # "Mumbai, IN"
+    lat:         Mapped[Optional[float]]    = mapped_column(Float)
+    lon:         Mapped[Optional[float]]    = mapped_column(Float)
+    searched_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=SERVER_NOW, index=True)
+    success:     Mapped[Optional[bool]]     = mapped_column(Boolean, default=True)
 
-    id          = Column(Integer, primary_key=True, index=True)
-    query       = Column(String(200), nullable=False)
-    resolved_to = Column(String(200))   # "Mumbai, IN"
-    lat         = Column(Float)
-    lon         = Column(Float)
-    searched_at = Column(DateTime, default=datetime.utcnow, index=True)
-    success     = Column(Boolean, default=True)
+    @validates("query")
+    def _normalize_query(self, _key, value):
+        self.query_norm = normalize_query(value)
+        return value
+
+
+def normalize_query(value: Optional[str]) -> Optional[str]:
+    return value.strip().lower() if value else None
 
 
 class Alert(Base):
     """User-defined flood risk threshold alerts."""
     __tablename__ = "alerts"
+    __table_args__ = (
+        Index("ix_alerts_city_active", "city_id", "is_active", postgresql_concurrently=True),
+        # Threshold checks only ever look at live alerts; this stays small no
+        # matter how many deactivated ones pile up. SQLite only matches a
+        # partial index whose WHERE appears verbatim in the query, hence "= 1".
+        Index(
+            "ix_alerts_active_city_thresh", "city_id", "threshold",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+            postgresql_concurrently=True,
+        ),
+    )
 
-    id              = Column(Integer, primary_key=True, index=True)
-    city_id         = Column(Integer, ForeignKey("cities.id"), nullable=False)
-    threshold       = Column(Float, nullable=False)   # 0–100 score
-    label           = Column(String(200), default="")
-    is_active       = Column(Boolean, default=True)
-    created_at      = Column(DateTime, default=datetime.utcnow)
-    last_triggered  = Column(DateTime, nullable=True)
-    trigger_count   = Column(Integer, default=0)
+    id:             Mapped[int]                = mapped_column(Integer, primary_key=True)
+    city_id:        Mapped[int]                = mapped_column(Integer, ForeignKey("cities.id", ondelete="CASCADE"))
+    threshold:      Mapped[float]              = mapped_column(Float)   # 0–100 score
+    label:          Mapped[Optional[str]]      = mapped_column(String(200), default="")
+    is_active:      Mapped[Optional[bool]]     = mapped_column(Boolean, default=True)
+    created_at:     Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=SERVER_NOW)
+    last_triggered: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    trigger_count:  Mapped[Optional[int]]      = mapped_column(Integer, default=0)
 
-    city = relationship("City", back_populates="alerts")
+    city: Mapped["City"] = relationship(back_populates="alerts", lazy="raise_on_sql")
 
 
 class ApiKey(Base):
-    """Simple API key authentication."""
+    """Simple API key authentication. Only a digest of the key is stored."""
     __tablename__ = "api_keys"
 
-    id         = Column(Integer, primary_key=True, index=True)
-    key        = Column(String(64), unique=True, nullable=False, index=True)
-    label      = Column(String(200), default="")
-    is_active  = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    last_used  = Column(DateTime, nullable=True)
-    call_count = Column(Integer, default=0)
+    id:         Mapped[int]                = mapped_column(Integer, primary_key=True)
+    key_hash:   Mapped[bytes]              = mapped_column(LargeBinary(32), unique=True, index=True)
+    label:      Mapped[Optional[str]]      = mapped_column(String(200), default="")
+    is_active:  Mapped[Optional[bool]]     = mapped_column(Boolean, default=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=SERVER_NOW)
+    last_used:  Mapped[Optional[datetime]] = mapped_column(DateTime)
+    call_count: Mapped[Optional[int]]      = mapped_column(Integer, default=0)
+
+
+def hash_api_key(raw_key: str) -> bytes:
+    """Fixed-width 32-byte digest stored in (and looked up via) ApiKey.key_hash."""
+    return hashlib.blake2b(raw_key.encode(), digest_size=32).digest()
+
+
+# ─── Counters ──────────────────────────────────────────────────────────────
+# Always bump usage counters with these: a single UPDATE … SET n = n + 1 is one
+# round trip and can't lose increments the way load / += 1 / commit can.
+
+def add_api_key_usage(session, usage: List[dict]):
+    """Apply buffered [{"kid", "delta", "ts"}, …] API key usage as one executemany."""
+    if not usage:
+        return
+    session.connection().execute(
+        update(ApiKey).where(ApiKey.id == bindparam("kid"))
+        .values(call_count=ApiKey.call_count + bindparam("delta"), last_used=bindparam("ts")),
+        usage,
+    )
+    session.commit()
+
+
+def bump_alerts(session, alert_ids: List[int]):
+    if not alert_ids:
+        return
+    # Bound, not func.now(): last_triggered is naive UTC like api_keys.last_used,
+    # and the database's now() is session-local time on Postgres and whole
+    # seconds on SQLite.
+    session.execute(
+        update(Alert).where(Alert.id.in_(alert_ids))
+        .values(trigger_count=Alert.trigger_count + 1, last_triggered=datetime.now(timezone.utc))
+    )
+    session.commit()
+
+
+# ─── Loaders ───────────────────────────────────────────────────────────────
+
+def active_api_keys(db) -> dict:
+    """{key_hash: id} for every active API key."""
+    return dict(db.execute(select(ApiKey.key_hash, ApiKey.id).where(ApiKey.is_active == True)).all())
+
+
+def cities_with_logs(db) -> List[City]:
+    """All cities with their weather logs eager-loaded (1 + 1 queries)."""
+    return db.scalars(select(City).options(selectinload(City.weather_logs))).all()
+
+
+# ─── Bulk Helpers ──────────────────────────────────────────────────────────
+
+def create_returning(session, model, data):
+    """
+    INSERT one or more rows and get the mapped objects back, generated id and
+    server defaults included, from the same round trip (INSERT … RETURNING).
+    Prefer this over add() + commit() + refresh() when the new rows are
+    needed afterwards.
+    """
+    return session.scalars(insert(model).returning(model), data).all()
+
+
+def bulk_insert_weather_logs(session, rows: list[dict]):
+    """
+    Insert many WeatherLog rows (dicts keyed by column name) in one go.
+    Postgres/psycopg2 streams them through COPY; other backends get a single
+    executemany INSERT. The caller owns the commit.
+    """
+    if not rows:
+        return
+    if "flood_score" in rows[0]:   # accept the hybrid name, like the ORM does
+        rows = [
+            {k: v for k, v in r.items() if k != "flood_score"}
+            | {"flood_score_x100": _score_x100(r["flood_score"])}
+            for r in rows
+        ]
+    bind = session.get_bind()
+    if bind.dialect.driver != "psycopg2":
+        session.execute(insert(WeatherLog), rows)
+        return
+
+    cols = [c for c in WeatherLog.__table__.columns if c.name != "id" and c.name in rows[0]]
+    # COPY bypasses SQLAlchemy's bind processing, so apply it here
+    # (e.g. flood_level "HIGH" -> 2).
+    procs = [c.type.bind_processor(bind.dialect) or (lambda v: v) for c in cols]
+    buf = io.StringIO()
+    writer = csv.writer(buf, delimiter="\t")
+    for row in rows:
+        values = (proc(row.get(c.name)) for c, proc in zip(cols, procs))
+        writer.writerow([r"\N" if v is None else v for v in values])
+    buf.seek(0)
+
+    cur = session.connection().connection.cursor()
+    try:
+        cur.copy_expert(
+            f"COPY weather_logs ({', '.join(c.name for c in cols)}) FROM STDIN "
+            "WITH (FORMAT csv, DELIMITER E'\\t', NULL '\\N')",
+            buf,
+        )
+    finally:
+        cur.close()
+
+
+def bulk_insert_search_history(session, rows: list[dict]):
+    """executemany INSERT of SearchHistory dicts; fills query_norm like the ORM does."""
+    if not rows:
+        return
+    session.execute(
+        insert(SearchHistory),
+        [r | {"query_norm": normalize_query(r["query"])} for r in rows],
+    )
+
+
+# ─── Upgrades ──────────────────────────────────────────────────────────────
+# Databases created by earlier versions are brought up to the current models
+# on startup. A table that differs from its model (see _is_stale) is rebuilt:
+# renamed aside, recreated, its rows copied over through the table's row
+# upgrader below, and the old copy dropped. SQLite only (it can't ALTER a
+# foreign key or a default); see README "Upgrading" for Postgres.
+
+def _upgrade_api_key(row: dict) -> dict:
+    if "key" in row:   # plaintext key -> digest
+        row["key_hash"] = hash_api_key(row.pop("key"))
+    return row
+
+
+def _upgrade_weather_log(row: dict) -> dict:
+    if "flood_score" in row:   # float column -> scaled SMALLINT
+        row["flood_score_x100"] = _score_x100(row.pop("flood_score"))
+    if isinstance(row.get("flood_level"), int):
+        row["flood_level"] = FloodLevel(row["flood_level"])
+    return row   # "HIGH"-style strings are converted by FloodLevelType
+
+
+def _upgrade_search_history(row: dict) -> dict:
+    if row.get("query_norm") is None:
+        row["query_norm"] = normalize_query(row["query"])
+    return row
+
+
+_UPGRADE_ROW = {
+    "api_keys":       _upgrade_api_key,
+    "weather_logs":   _upgrade_weather_log,
+    "search_history": _upgrade_search_history,
+}
+
+
+def _unparen(sql: str) -> str:
+    return sql[1:-1] if sql.startswith("(") and sql.endswith(")") else sql
+
+
+def _is_stale(insp, table) -> bool:
+    """
+    Existing table differs from its model: columns, server defaults, FK ON
+    DELETE rules, CHECK constraints, or indexes the model no longer declares.
+    Missing indexes don't count; init_db() creates those in place.
+    """
+    columns = {c["name"]: c for c in insp.get_columns(table.name)}
+    if set(columns) != set(table.columns.keys()):
+        return True
+    for col in table.columns:
+        if col.server_default is None:
+            continue
+        default = columns[col.name]["default"]
+        if default is None:
+            return True
+        # Postgres may spell an equivalent default differently; on SQLite the
+        # text is what was declared, so an older default (CURRENT_TIMESTAMP)
+        # is caught too.
+        expected = str(col.server_default.arg.compile(dialect=insp.dialect))
+        if IS_SQLITE and _unparen(default) != _unparen(expected):
+            return True
+    ondelete = {
+        fk["referred_table"]: ((fk.get("options") or {}).get("ondelete") or "").upper()
+        for fk in insp.get_foreign_keys(table.name)
+    }
+    if any(ondelete.get(fk.column.table.name) != (fk.ondelete or "").upper() for fk in table.foreign_keys):
+        return True
+    checks = {c.name for c in table.constraints if isinstance(c, CheckConstraint)}
+    if checks - {c["name"] for c in insp.get_check_constraints(table.name)}:
+        return True
+    indexes = {ix["name"] for ix in insp.get_indexes(table.name) if not ix.get("duplicates_constraint")}
+    return bool(indexes - {ix.name for ix in table.indexes})
+
+
+def _rebuild_table(conn, table):
+    old_name = f"{table.name}_old"
+    for ix in inspect(conn).get_indexes(table.name):   # names are reused below
+        conn.execute(text(f'DROP INDEX "{ix["name"]}"'))
+    conn.execute(text(f'ALTER TABLE "{table.name}" RENAME TO "{old_name}"'))
+    old = Table(old_name, MetaData(), autoload_with=conn)
+    table.create(conn)
+
+    upgrade = _UPGRADE_ROW.get(table.name, lambda row: row)
+    keep = set(table.columns.keys())
+    for batch in conn.execute(select(old)).mappings().partitions(1000):
+        conn.execute(insert(table), [
+            {k: v for k, v in upgrade(dict(row)).items() if k in keep} for row in batch
+        ])
+    conn.execute(text(f'DROP TABLE "{old_name}"'))
+    log.warning("upgraded table %s to the current schema", table.name)
+
+
+def upgrade_schema(conn) -> List[str]:
+    """
+    Rebuild every stale table in one transaction; returns their names. conn
+    must be in AUTOCOMMIT mode so the explicit BEGIN also covers the DDL.
+    """
+    insp = inspect(conn)
+    tables = set(insp.get_table_names())
+    stale = [t for t in Base.metadata.sorted_tables if t.name in tables and _is_stale(insp, t)]
+    if not stale:
+        return []
+    if not IS_SQLITE:
+        raise RuntimeError(
+            f"Database schema is out of date ({', '.join(t.name for t in stale)}); "
+            "see README 'Upgrading an existing database'."
+        )
+    # SQLite's procedure for table rebuilds: with foreign keys off (and the
+    # legacy rename), other tables' REFERENCES keep naming the original table,
+    # so rebuilding a parent such as cities can't repoint its children at the
+    # "_old" copy and cascade-delete them when it is dropped. The integrity
+    # check before COMMIT stands in for the enforcement switched off here.
+    conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+    conn.exec_driver_sql("PRAGMA legacy_alter_table=ON")
+    try:
+        conn.exec_driver_sql("BEGIN")
+        try:
+            for table in stale:
+                _rebuild_table(conn, table)
+            if conn.exec_driver_sql("PRAGMA foreign_key_check").first():
+                raise RuntimeError("Schema upgrade left rows with dangling foreign keys.")
+        except Exception:
+            conn.exec_driver_sql("ROLLBACK")
+            raise
+        conn.exec_driver_sql("COMMIT")
+    finally:
+        conn.exec_driver_sql("PRAGMA legacy_alter_table=OFF")
+        conn.exec_driver_sql("PRAGMA foreign_keys=ON")
+    return [t.name for t in stale]
 
 
 # ─── Init ──────────────────────────────────────────────────────────────────
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    """
+    Create the schema on first start, upgrade tables left by older versions
+    (upgrade_schema), and create any index declared on a model after its
+    table was created (create_all only builds indexes with new tables).
+    Once everything exists this is catalog queries only. Runs in autocommit
+    mode because Postgres refuses CREATE INDEX CONCURRENTLY inside a
+    transaction.
+
+    Hot predicates and the indexes serving them:
+      alerts by city + is_active      ix_alerts_city_active, ix_alerts_active_city_thresh
+      weather log by city, newest     ix_weather_logs_city_recorded (scanned backwards)
+      search history, newest          ix_search_history_searched_at (scanned backwards)
+      stats HIGH-risk count           ix_weather_logs_level_time
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        upgrade_schema(conn)
+
+    insp = inspect(engine)
+    tables = set(insp.get_table_names())
+    missing = [
+        ix
+        for table in Base.metadata.sorted_tables if table.name in tables
+        for ix in table.indexes
+        if ix.name not in {i["name"] for i in insp.get_indexes(table.name)}
+    ]
+    if set(Base.metadata.tables) <= tables and not missing:
+        return
+    for ix in missing:   # only possible if upgrade_schema() couldn't run
+        absent = {c.name for c in ix.columns} - {c["name"] for c in insp.get_columns(ix.table.name)}
+        if absent:
+            raise RuntimeError(
+                f"Can't create index {ix.name}: {ix.table.name} has no column "
+                f"{', '.join(sorted(absent))}. Database schema is out of date; "
+                "see README 'Upgrading an existing database'."
+            )
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        Base.metadata.create_all(bind=conn)
+        for ix in missing:
+            ix.create(conn)
 
 
 def get_db():
@@ -125,3 +558,35 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_db_ro():
+    """
+    Read-only request session, scoped to the request's asyncio task. Must stay
+    an async dependency: asyncio.current_task() needs the event loop thread.
+    Anything that writes should depend on get_db() instead.
+    """
+    db = ScopedSession()
+    try:
+        yield db
+    finally:
+        ScopedSession.remove()
+
+
+def get_db_stream():
+    """
+    Session for long range scans: results come off a server-side cursor in
+    batches of 1000 instead of being fully materialized, e.g.
+
+        for wl in db.scalars(select(WeatherLog).execution_options(yield_per=1000)):
+            ...
+
+    Loops that touch many rows should call db.expunge_all() every batch so the
+    identity map doesn't grow with the scan.
+    """
+    db = SessionLocal()
+    db.connection(execution_options={"stream_results": True, "yield_per": 1000})
+    try:
+        yield db
+    finally:
+        db.close()
@@ -25,53 +25,89 @@ Routes:
     GET  /alerts/check/{city_id}  — Check if any alerts triggered
 
   Forecast
-    GET  /forecast                — 5-day / 3-hour forecast + flood risk
+    GET  /forecast                — 5-day / 3-hour forecast + flood risk (items or columns)
 
   Admin
     POST /admin/api-keys          — Generate API key
     GET  /admin/stats             — Dashboard stats
     DELETE /admin/api-keys/{key}  — Revoke key
+
+  Internal
+    GET  /internal/weather_logs.msgpack — Weather log export (MessagePack)
 """
 
 import asyncio
-import json
+import logging
+import math
 import os
 import secrets
-from datetime import datetime
-from typing import List, Optional
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Literal, Optional, Union
 
 import httpx
+import msgspec
+import numpy as np
+import orjson
+from cachetools import TTLCache
 from dotenv import load_dotenv
 from fastapi import (
-    FastAPI, Query, HTTPException, Depends,
+    FastAPI, Query, HTTPException, Depends, BackgroundTasks,
     Security, Request
 )
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from fastapi.security.api_key import APIKeyHeader
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from sqlalchemy.orm import Session
 
-from database import init_db, get_db, City, WeatherLog, SearchHistory, Alert, ApiKey
+from database import (
+    init_db, get_db, get_db_ro, SessionLocal,
+    create_returning, hash_api_key, add_api_key_usage, active_api_keys, bump_alerts,
+    bulk_insert_weather_logs, bulk_insert_search_history,
+    City, Alert, ApiKey,
+)
+import queries
 from schemas import (
-    GeoResponse, WeatherResponse, FloodRisk,
+    GeoResponse, WeatherResponse, FloodRisk, FLOOD_RISK_ADAPTER,
     CityCreate, CityResponse,
     WeatherLogResponse, SearchHistoryResponse,
     AlertCreate, AlertResponse,
-    ForecastResponse, ForecastItem,
+    ForecastResponse, ForecastColumnsResponse,
     ApiKeyCreate, ApiKeyResponse,
     MessageResponse, StatsResponse,
 )
+from schemas_fast import (
+    ENC, MSGPACK_ENC, from_rows, row_converter, FloodRiskS, WeatherResponseS, CityResponseS, WeatherLogResponseS,
+    SearchHistoryResponseS, AlertResponseS, ForecastItemS, ForecastResponseS,
+    ForecastColumnsS, ForecastColumnsResponseS,
+)
 
 load_dotenv()
 
+log = logging.getLogger("floodloop")
+
 OWM_API_KEY  = os.getenv("OPENWEATHERMAP_API_KEY", "")
 print("Loaded OWM_API_KEY:", OWM_API_KEY)
 OWM_BASE     = "https://api.openweathermap.org"
 ADMIN_SECRET = os.getenv("ADMIN_SECRET", "changeme-admin-secret")
 
+# Read once: neither changes for the life of the process
+REQUIRE_API_KEY = os.getenv("REQUIRE_API_KEY", "false").lower() == "true"
+_OWM_CONFIGURED = bool(OWM_API_KEY)
+
+OWM_URL_CURRENT  = f"{OWM_BASE}/data/2.5/weather"
+OWM_URL_FORECAST = f"{OWM_BASE}/data/2.5/forecast"
+OWM_URL_GEO      = f"{OWM_BASE}/geo/1.0/direct"
+_OWM_PARAMS      = (("appid", OWM_API_KEY), ("units", "metric"))   # + lat/lon per call
+
 # ─── App Setup ─────────────────────────────────────────────────────────────
 
 limiter = Limiter(key_func=get_remote_address)
@@ -82,6 +118,7 @@ app = FastAPI(
     version="2.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
 )
 
 app.state.limiter = limiter
@@ -99,29 +136,129 @@ app.add_middleware(
 )
 
 @app.on_event("startup")
-def startup():
+async def startup():
     init_db()
+    db = SessionLocal()
+    try:
+        app.state.api_keys = {h: ApiKeyUsage(kid) for h, kid in active_api_keys(db).items()}
+        app.state.api_key_changes = {}
+    finally:
+        db.close()
+    app.state.api_key_flusher = asyncio.create_task(_api_key_flusher(app))
+    # One pooled client for every OWM call: keep-alive connections are reused
+    # across requests instead of a fresh TCP + TLS handshake each time.
+    app.state.http = httpx.AsyncClient(
+        timeout=10,
+        limits=httpx.Limits(max_keepalive_connections=50, max_connections=200),
+        http2=True,
+    )
+    app.state.stream_hub = {}
+    app.state.weather_log_buf = deque()
+    app.state.search_log_buf = deque()
+    app.state.log_flush_failures = 0
+    app.state.log_flusher = asyncio.create_task(_log_flusher(app))
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.api_key_flusher.cancel()
+    app.state.log_flusher.cancel()
+    for flush in (_flush_api_keys, _flush_logs):   # one failing mustn't skip the rest
+        try:
+            await flush(app)
+        except Exception:
+            log.exception("Final %s on shutdown failed", flush.__name__)
+    for channel in list(app.state.stream_hub.values()):
+        channel.close()
+    await app.state.http.aclose()
 
 
 # ─── Auth ──────────────────────────────────────────────────────────────────
 
 API_KEY_HEADER = APIKeyHeader(name="X-API-Key", auto_error=False)
 
-def require_api_key(
-    api_key: Optional[str] = Security(API_KEY_HEADER),
-    db: Session = Depends(get_db),
-):
-    if os.getenv("REQUIRE_API_KEY", "false").lower() != "true":
-        return None
+# Active keys are held in memory (digest → ApiKeyUsage), so checking a key
+# costs no DB round trip. Usage is buffered and flushed every
+# API_KEY_FLUSH_SECS, and the key set is reloaded at the same time: a key
+# created or revoked by another worker takes effect here within one period.
+API_KEY_FLUSH_SECS = 30
+
+# Keys created (digest → ApiKeyUsage) or revoked (digest → None) here since
+# the current flush took its DB snapshot; they win over that snapshot. The
+# admin routes run in the threadpool, hence the lock.
+_api_keys_lock = threading.Lock()
+
+
+class ApiKeyUsage:
+    __slots__ = ("id", "calls", "last_used")
+
+    def __init__(self, key_id: int):
+        self.id = key_id
+        self.calls = 0
+        self.last_used: Optional[datetime] = None
+
+
+def _sync_api_keys(usage: List[dict]) -> dict:
+    db = SessionLocal()
+    try:
+        add_api_key_usage(db, usage)
+        return active_api_keys(db)
+    finally:
+        db.close()
+
+
+async def _flush_api_keys(app: FastAPI):
+    with _api_keys_lock:   # the admin routes add and remove keys meanwhile
+        pending = [(key, key.calls) for key in app.state.api_keys.values() if key.calls]
+        changes = app.state.api_key_changes = {}
+    usage = [{"kid": key.id, "delta": calls, "ts": key.last_used} for key, calls in pending]
+    for key, _ in pending:
+        key.calls = 0
+    try:
+        active = await run_in_threadpool(_sync_api_keys, usage)
+    except Exception:
+        for key, calls in pending:   # not written: count them again next flush
+            key.calls += calls
+        raise
+
+    # Merge into the live dict: only apply what other workers changed, never
+    # undo a create or revoke made here while the snapshot was in flight.
+    keys = app.state.api_keys
+    with _api_keys_lock:
+        for h in keys.keys() - active.keys() - changes.keys():
+            del keys[h]
+        for h in active.keys() - keys.keys() - changes.keys():
+            keys[h] = ApiKeyUsage(active[h])
+
+
+async def _api_key_flusher(app: FastAPI):
+    while True:
+        await asyncio.sleep(API_KEY_FLUSH_SECS)
+        try:
+            await _flush_api_keys(app)
+        except Exception:
+            log.exception("API key usage flush failed; retrying next period")
+
+
+# Both are async: a plain def dependency would cost a threadpool hop per request.
+async def _require_api_key(request: Request, api_key: Optional[str] = Security(API_KEY_HEADER)):
     if not api_key:
         raise HTTPException(status_code=401, detail="Missing X-API-Key header.")
-    key_row = db.query(ApiKey).filter(ApiKey.key == api_key, ApiKey.is_active == True).first()
-    if not key_row:
+    key = request.app.state.api_keys.get(hash_api_key(api_key))
+    if key is None:
         raise HTTPException(status_code=403, detail="Invalid or revoked API key.")
-    key_row.last_used = datetime.utcnow()
-    key_row.call_count += 1
-    db.commit()
-    return key_row
+    key.calls += 1
+    key.last_used = datetime.now(timezone.utc)
+    return key
+
+
+async def _no_api_key():
+    return None
+
+
+# Chosen once at import. With auth off, protected routes get a dependency
+# with no parameters: no header parsing, no security scheme in the docs.
+require_api_key = _require_api_key if REQUIRE_API_KEY else _no_api_key
 
 
 def require_admin(admin_secret: str = Query(...)):
@@ -129,6 +266,22 @@ def require_admin(admin_secret: str = Query(...)):
         raise HTTPException(status_code=403, detail="Invalid admin secret.")
 
 
+# ─── Responses ─────────────────────────────────────────────────────────────
+
+def _fast_json(obj) -> Response:
+    """
+    Encode a schemas_fast Struct (or a list of them) straight to the body.
+    The route's response_model still documents the shape, but FastAPI does
+    no validation on a Response it is handed back.
+    """
+    return Response(ENC.encode(obj), media_type="application/json")
+
+
+def _float(v) -> Optional[float]:
+    """OWM sends whole numbers as ints; float fields keep their "28.0" form on the wire."""
+    return None if v is None else float(v)
+
+
 # ─── Flood Risk Engine ─────────────────────────────────────────────────────
 
 def calculate_flood_probability(
@@ -144,8 +297,22 @@ def calculate_flood_probability(
     score += min(max(humidity - 60, 0) / 40, 1.0) * 20
     score += min(wind_speed / 25, 1.0) * 10
     score += min(clouds / 100, 1.0) * 5
-    score = round(min(score, 100), 1)
-
+    score = min(score, 100)
+    if not math.isfinite(score):   # NaN / -inf input: below every band, as before
+        return FloodRisk.model_construct(score=score, level="LOW", color="#22c55e")
+    # round(score, 1) rounds the exact score; round(score * 10) would round a
+    # product that was already rounded once, and lands 0.1 off on ~0.5% of
+    # inputs. flood_scores() rounds the same way.
+    return _flood_risk_for_score(round(round(score, 1) * 10))
+
+
+@lru_cache(maxsize=1100)
+def _flood_risk_for_score(tenths: int) -> FloodRisk:
+    """
+    One shared FloodRisk per 0.1-point score (0.0–100.0: 1001 of them), each
+    validated once when first built. Frozen, so sharing it is safe.
+    """
+    score = tenths / 10
     if score >= 65:
         level, color = "HIGH", "#ef4444"
     elif score >= 35:
@@ -153,42 +320,334 @@ def calculate_flood_probability(
     else:
         level, color = "LOW", "#22c55e"
 
-    return FloodRisk(score=score, level=level, color=color)
+    return FLOOD_RISK_ADAPTER.validate_python({"score": score, "level": level, "color": color})
+
+
+def flood_scores(rain_1h, rain_3h, humidity, wind_speed, clouds) -> List[float]:
+    """
+    Vectorised calculate_flood_probability score over equal-length arrays.
+    Only the final rounding is per element: np.round scales by 10 first and
+    doesn't always agree with round(x, 1).
+    """
+    score = np.minimum(rain_1h / 20, 1.0) * 40
+    score += np.minimum(rain_3h / 40, 1.0) * 25
+    score += np.minimum(np.maximum(humidity - 60, 0) / 40, 1.0) * 20
+    score += np.minimum(wind_speed / 25, 1.0) * 10
+    score += np.minimum(clouds / 100, 1.0) * 5
+    return [round(x, 1) for x in np.minimum(score, 100).tolist()]
+
+
+# Indexed by band: 0 = LOW (< 35), 1 = MEDIUM, 2 = HIGH (>= 65)
+_LEVELS = np.array(["LOW", "MEDIUM", "HIGH"])
+_COLORS = np.array(["#22c55e", "#f59e0b", "#ef4444"])
+
+
+def flood_risk_columns(rain_1h, rain_3h, humidity, wind_speed, clouds) -> tuple:
+    """(scores, levels, colors) as three parallel lists."""
+    scores = flood_scores(rain_1h, rain_3h, humidity, wind_speed, clouds)
+    arr = np.array(scores)
+    bands = (arr >= 35).astype(np.int8) + (arr >= 65).astype(np.int8)
+    return scores, _LEVELS[bands].tolist(), _COLORS[bands].tolist()
+
+
+# ─── Log Buffers ───────────────────────────────────────────────────────────
+# Search and weather logs are appended to in-memory buffers on the request
+# path and written every LOG_FLUSH_SECS as one executemany per table: one
+# commit (one fsync) per flush instead of one per event. A batch whose write
+# fails goes back on the buffers and is retried on the next flush; after
+# LOG_FLUSH_RETRIES failures in a row the buffered rows are written one at a
+# time instead, and any row that still fails is logged and dropped, so one bad
+# row can't hold up (or grow) the buffers for good.
+LOG_FLUSH_SECS    = 0.5
+LOG_FLUSH_RETRIES = 3
+
+
+def _log_search(query: str, geo=None, success=True):
+    app.state.search_log_buf.append({
+        "query": query,
+        "resolved_to": f"{geo['name']}, {geo['country']}" if geo else None,
+        "lat": geo["lat"] if geo else None,
+        "lon": geo["lon"] if geo else None,
+        "success": success,
+        "searched_at": datetime.now(timezone.utc),
+    })
+
+
+def _log_weather(city_id: int, w: dict, flood: FloodRisk):
+    app.state.weather_log_buf.append({
+        "city_id": city_id,
+        "temperature": w.get("main", {}).get("temp"),
+        "feels_like": w.get("main", {}).get("feels_like"),
+        "humidity": w.get("main", {}).get("humidity"),
+        "pressure": w.get("main", {}).get("pressure"),
+        "wind_speed": w.get("wind", {}).get("speed"),
+        "wind_deg": w.get("wind", {}).get("deg"),
+        "clouds": w.get("clouds", {}).get("all"),
+        "rain_1h": w.get("rain", {}).get("1h", 0),
+        "rain_3h": w.get("rain", {}).get("3h", 0),
+        "description": w.get("weather", [{}])[0].get("description", ""),
+        "icon": w.get("weather", [{}])[0].get("icon", ""),
+        "flood_score": flood.score,
+        "flood_level": flood.level,
+        "recorded_at": datetime.now(timezone.utc),
+    })
+
+
+def _write_logs(weather_rows: List[dict], search_rows: List[dict]):
+    db = SessionLocal()
+    try:
+        if weather_rows:
+            # A city deleted (or never saved) since the reading was buffered
+            # would fail the whole batch on its foreign key, so drop those rows.
+            ids = list({r["city_id"] for r in weather_rows})
+            known = set(db.scalars(queries.CITY_IDS_IN, {"ids": ids}))
+            bulk_insert_weather_logs(db, [r for r in weather_rows if r["city_id"] in known])
+        bulk_insert_search_history(db, search_rows)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _write_logs_each(weather_rows: List[dict], search_rows: List[dict]):
+    for row in weather_rows:
+        try:
+            _write_logs([row], [])
+        except Exception:
+            log.exception("Dropping weather log row that can't be written: %r", row)
+    for row in search_rows:
+        try:
+            _write_logs([], [row])
+        except Exception:
+            log.exception("Dropping search log row that can't be written: %r", row)
+
+
+def _drain(buf: deque) -> List[dict]:
+    return [buf.popleft() for _ in range(len(buf))]
+
+
+async def _flush_logs(app: FastAPI):
+    weather_rows = _drain(app.state.weather_log_buf)
+    search_rows = _drain(app.state.search_log_buf)
+    if not (weather_rows or search_rows):
+        return
+    if app.state.log_flush_failures >= LOG_FLUSH_RETRIES:
+        app.state.log_flush_failures = 0
+        await run_in_threadpool(_write_logs_each, weather_rows, search_rows)
+        return
+    try:
+        await run_in_threadpool(_write_logs, weather_rows, search_rows)
+    except Exception:
+        # Requeue ahead of anything buffered meanwhile; the next tick retries
+        app.state.log_flush_failures += 1
+        app.state.weather_log_buf.extendleft(reversed(weather_rows))
+        app.state.search_log_buf.extendleft(reversed(search_rows))
+        raise
+    app.state.log_flush_failures = 0
+
+
+async def _log_flusher(app: FastAPI):
+    while True:
+        await asyncio.sleep(LOG_FLUSH_SECS)
+        try:
+            await _flush_logs(app)
+        except Exception:
+            log.exception("Log flush failed; batch requeued")
+
+
+def _bump_fired_alerts(city_id: int, score: float):
+    """Background task: bump every active alert on the city that score trips."""
+    db = SessionLocal()
+    try:
+        bump_alerts(db, db.scalars(queries.FIRED_ALERT_IDS, {"cid": city_id, "score": score}).all())
+    finally:
+        db.close()
+
+
+# ─── OWM Cache ─────────────────────────────────────────────────────────────
+# OWM refreshes roughly every 10 minutes, so repeat lookups for the same spot
+# (many users, SSE ticks) are served from memory. Concurrent misses for one
+# key share a single upstream request.
+
+weather_cache  = TTLCache(maxsize=4096, ttl=120)
+forecast_cache = TTLCache(maxsize=2048, ttl=600)
+_owm_inflight  = {OWM_URL_CURRENT: {}, OWM_URL_FORECAST: {}}
+
+
+def coord_key(lat: float, lon: float):
+    """
+    Pack a location onto a 0.001° grid (~110 m, finer than OWM's own data)
+    as one int: cheaper to build and hash than a tuple of rounded floats.
+    Anything off the globe (or NaN) keys as a plain tuple instead, which
+    can't collide with a packed int.
+    """
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return (lat, lon)
+    return ((round(lat * 1000) + 90_000) << 32) | (round(lon * 1000) + 180_000)
+
+
+async def _owm_get(url: str, lat: float, lon: float, error: str) -> dict:
+    resp = await app.state.http.get(url, params=(*_OWM_PARAMS, ("lat", lat), ("lon", lon)))
+    if resp.status_code != 200:
+        raise HTTPException(resp.status_code, error)
+    return orjson.loads(resp.content)
 
 
-# ─── Helpers ───────────────────────────────────────────────────────────────
+async def _owm_cached(url: str, cache: TTLCache, lat: float, lon: float,
+                      error: str, fresh: bool = False) -> dict:
+    key = coord_key(lat, lon)
+    if not fresh:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
 
-def _log_search(db: Session, query: str, geo=None, success=True):
-    entry = SearchHistory(
-        query=query,
-        resolved_to=f"{geo['name']}, {geo['country']}" if geo else None,
-        lat=geo["lat"] if geo else None,
-        lon=geo["lon"] if geo else None,
-        success=success,
-    )
-    db.add(entry)
-    db.commit()
+    inflight = _owm_inflight[url]
+    task = inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_owm_get(url, lat, lon, error))
+        inflight[key] = task
 
+        def _done(t):
+            inflight.pop(key, None)
+            if not t.cancelled() and t.exception() is None:
+                cache[key] = t.result()
+        task.add_done_callback(_done)
 
-def _log_weather(db: Session, city_id: int, w: dict, flood: FloodRisk):
-    log = WeatherLog(
-        city_id=city_id,
-        temperature=w.get("main", {}).get("temp"),
-        feels_like=w.get("main", {}).get("feels_like"),
-        humidity=w.get("main", {}).get("humidity"),
-        pressure=w.get("main", {}).get("pressure"),
-        wind_speed=w.get("wind", {}).get("speed"),
-        wind_deg=w.get("wind", {}).get("deg"),
-        clouds=w.get("clouds", {}).get("all"),
-        rain_1h=w.get("rain", {}).get("1h", 0),
-        rain_3h=w.get("rain", {}).get("3h", 0),
-        description=w.get("weather", [{}])[0].get("description", ""),
-        icon=w.get("weather", [{}])[0].get("icon", ""),
-        flood_score=flood.score,
-        flood_level=flood.level,
-    )
-    db.add(log)
-    db.commit()
+    # shield: one caller going away must not cancel the fetch for the others
+    return await asyncio.shield(task)
+
+
+async def fetch_owm_weather(lat: float, lon: float, fresh: bool = False) -> dict:
+    """Current conditions (parsed OWM JSON; shared — don't mutate)."""
+    return await _owm_cached(OWM_URL_CURRENT, weather_cache,
+                             lat, lon, "Weather API error.", fresh)
+
+
+async def fetch_owm_forecast(lat: float, lon: float) -> dict:
+    """5-day / 3-hour forecast (parsed OWM JSON; shared — don't mutate)."""
+    return await _owm_cached(OWM_URL_FORECAST, forecast_cache,
+                             lat, lon, "Forecast API error.")
+
+
+_owm_fanout = asyncio.Semaphore(50)
+
+
+async def fetch_many(coords) -> list:
+    """Current weather for many (lat, lon) pairs concurrently, 50 in flight at most."""
+    async def one(lat, lon):
+        async with _owm_fanout:
+            return await fetch_owm_weather(lat, lon)
+    return await asyncio.gather(*(one(lat, lon) for lat, lon in coords))
+
+
+# ─── Stream Hub ────────────────────────────────────────────────────────────
+# Every /weather-stream viewer of the same spot and interval shares one
+# poller: upstream calls scale with distinct streams, not connected clients.
+
+KEEPALIVE_FRAME = b": keepalive\n\n"
+
+
+async def _stream_frame(lat: float, lon: float) -> tuple:
+    """(OWM reading or None on error, encoded SSE frame)."""
+    d = None
+    try:
+        d = await fetch_owm_weather(lat, lon)
+        rain = d.get("rain", {})
+        main = d.get("main", {})
+        wind = d.get("wind", {})
+        clouds = d.get("clouds", {})
+        flood = calculate_flood_probability(
+            rain_1h=rain.get("1h", 0),
+            rain_3h=rain.get("3h", 0),
+            humidity=main.get("humidity", 0),
+            wind_speed=wind.get("speed", 0),
+            clouds=clouds.get("all", 0),
+        )
+        payload = {
+            "temperature": main.get("temp"),
+            "humidity": main.get("humidity"),
+            "wind_speed": wind.get("speed"),
+            "rain_1h": rain.get("1h", 0),
+            "rain_3h": rain.get("3h", 0),
+            "clouds": clouds.get("all"),
+            "description": d.get("weather", [{}])[0].get("description", ""),
+            "flood_risk": flood.model_dump(),
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+    except HTTPException:
+        payload = {"error": "API error"}
+    except Exception as e:
+        payload = {"error": str(e)}
+    return d, b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+class StreamChannel:
+    """One OWM poller fanned out to a queue per subscriber."""
+
+    def __init__(self, hub: dict, key: tuple, lat: float, lon: float, interval: int):
+        self.hub, self.key = hub, key
+        self.lat, self.lon, self.interval = lat, lon, interval
+        self.subscribers: set = set()
+        self.last: Optional[bytes] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=4)
+        if self.last is not None:
+            queue.put_nowait(self.last)   # late joiners get the current reading
+        self.subscribers.add(queue)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._poll())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+        if not self.subscribers:
+            self.close()
+
+    def close(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        if self.hub.get(self.key) is self:
+            del self.hub[self.key]
+
+    def _publish(self, frame: bytes):
+        if frame is not KEEPALIVE_FRAME:
+            self.last = frame
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()   # slow reader: drop its oldest frame
+            queue.put_nowait(frame)
+
+    async def _poll(self):
+        # Ticks run on a fixed monotonic schedule, so the fetch time doesn't
+        # stretch the interval. A reading identical to the last one (the same
+        # cached OWM response) goes out as a keepalive comment only.
+        deadline = time.monotonic()
+        sent = None
+        while True:
+            d, frame = await _stream_frame(self.lat, self.lon)
+            if d is not None and d is sent:
+                self._publish(KEEPALIVE_FRAME)
+            else:
+                self._publish(frame)
+                sent = d
+            # after a stall longer than one interval, resume rather than burst
+            deadline = max(deadline + self.interval, time.monotonic())
+            await asyncio.sleep(deadline - time.monotonic())
+
+
+def _stream_subscribe(hub: dict, lat: float, lon: float, interval: int) -> tuple:
+    """
+    (channel, queue) for a new viewer. Lookup and subscribe happen with no
+    await in between, so the channel can't be closed by its last viewer
+    leaving in the gap and hand back a queue nothing feeds any more.
+    """
+    key = (coord_key(lat, lon), interval)
+    channel = hub.get(key)
+    if channel is None:
+        channel = hub[key] = StreamChannel(hub, key, lat, lon, interval)
+    return channel, channel.subscribe()
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -204,32 +663,30 @@ async def root():
 @limiter.limit("30/minute")
 async def geocode_city(
     request: Request,
-    city: str = Query(..., min_length=1),
-    db: Session = Depends(get_db),
+    city: str = Query(..., min_length=1, max_length=200),
     _auth=Depends(require_api_key),
 ):
-    if not OWM_API_KEY:
+    if not _OWM_CONFIGURED:
         raise HTTPException(500, "OWM API key not configured.")
 
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(
-            f"{OWM_BASE}/geo/1.0/direct",
-            params={"q": city, "limit": 1, "appid": OWM_API_KEY},
-        )
+    resp = await request.app.state.http.get(
+        OWM_URL_GEO,
+        params=(("q", city), ("limit", 1), ("appid", OWM_API_KEY)),
+    )
 
     if resp.status_code != 200:
-        _log_search(db, city, success=False)
+        _log_search(city, success=False)
         raise HTTPException(resp.status_code, "Geocoding API error.")
 
-    data = resp.json()
+    data = orjson.loads(resp.content)
     if not data:
-        _log_search(db, city, success=False)
+        _log_search(city, success=False)
         raise HTTPException(404, f"City '{city}' not found.")
 
     loc = data[0]
     geo = {"name": loc.get("name"), "country": loc.get("country"),
            "state": loc.get("state", ""), "lat": loc["lat"], "lon": loc["lon"]}
-    _log_search(db, city, geo=geo, success=True)
+    _log_search(city, geo=geo, success=True)
     return GeoResponse(**geo)
 
 
@@ -237,26 +694,18 @@ async def geocode_city(
 @limiter.limit("30/minute")
 async def get_weather(
     request: Request,
-    lat: float,
-    lon: float,
+    background: BackgroundTasks,
+    lat: float = Query(ge=-90, le=90),
+    lon: float = Query(ge=-180, le=180),
     save_log: bool = False,
     city_id: Optional[int] = None,
-    db: Session = Depends(get_db),
     _auth=Depends(require_api_key),
 ):
-    if not OWM_API_KEY:
+    if not _OWM_CONFIGURED:
         raise HTTPException(500, "OWM API key not configured.")
 
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(
-            f"{OWM_BASE}/data/2.5/weather",
-            params={"lat": lat, "lon": lon, "appid": OWM_API_KEY, "units": "metric"},
-        )
-
-    if resp.status_code != 200:
-        raise HTTPException(resp.status_code, "Weather API error.")
-
-    d = resp.json()
+    # save_log snapshots go to history, so always take them fresh
+    d = await fetch_owm_weather(lat, lon, fresh=save_log)
     rain = d.get("rain", {})
     main = d.get("main", {})
     wind = d.get("wind", {})
@@ -271,82 +720,49 @@ async def get_weather(
     )
 
     if save_log and city_id:
-        _log_weather(db, city_id, d, flood)
-        alerts = db.query(Alert).filter(
-            Alert.city_id == city_id, Alert.is_active == True,
-            Alert.threshold <= flood.score,
-        ).all()
-        for alert in alerts:
-            alert.last_triggered = datetime.utcnow()
-            alert.trigger_count += 1
-        db.commit()
+        _log_weather(city_id, d, flood)
+        background.add_task(_bump_fired_alerts, city_id, flood.score)
 
-    return WeatherResponse(
+    return _fast_json(WeatherResponseS(
         city=d.get("name", ""),
-        temperature=main.get("temp"),
-        feels_like=main.get("feels_like"),
-        humidity=main.get("humidity"),
-        pressure=main.get("pressure"),
-        wind_speed=wind.get("speed"),
-        wind_deg=wind.get("deg", 0),
-        clouds=clouds.get("all"),
-        rain_1h=rain.get("1h", 0),
-        rain_3h=rain.get("3h", 0),
+        temperature=_float(main.get("temp")),
+        feels_like=_float(main.get("feels_like")),
+        humidity=_float(main.get("humidity")),
+        pressure=_float(main.get("pressure")),
+        wind_speed=_float(wind.get("speed")),
+        wind_deg=_float(wind.get("deg", 0)),
+        clouds=_float(clouds.get("all")),
+        rain_1h=float(rain.get("1h", 0)),
+        rain_3h=float(rain.get("3h", 0)),
         description=d.get("weather", [{}])[0].get("description", ""),
         icon=d.get("weather", [{}])[0].get("icon", ""),
         visibility=d.get("visibility"),
-        flood_risk=flood,
-    )
+        flood_risk=FloodRiskS(flood.score, flood.level, flood.color),
+    ))
 
 
 @app.get("/weather-stream", tags=["Core"])
 async def weather_stream(
-    lat: float,
-    lon: float,
+    request: Request,
+    lat: float = Query(ge=-90, le=90),
+    lon: float = Query(ge=-180, le=180),
     interval: int = Query(default=60, ge=10, le=300),
     _auth=Depends(require_api_key),
 ):
-    if not OWM_API_KEY:
+    if not _OWM_CONFIGURED:
         raise HTTPException(500, "OWM API key not configured.")
 
+    hub = request.app.state.stream_hub
+
     async def event_generator():
-        async with httpx.AsyncClient(timeout=15) as client:
+        # Subscribing here, not in the handler, also means a client gone
+        # before the body starts never leaves a channel behind in the hub.
+        channel, queue = _stream_subscribe(hub, lat, lon, interval)
+        try:
             while True:
-                try:
-                    resp = await client.get(
-                        f"{OWM_BASE}/data/2.5/weather",
-                        params={"lat": lat, "lon": lon, "appid": OWM_API_KEY, "units": "metric"},
-                    )
-                    if resp.status_code == 200:
-                        d = resp.json()
-                        rain = d.get("rain", {})
-                        main = d.get("main", {})
-                        wind = d.get("wind", {})
-                        clouds = d.get("clouds", {})
-                        flood = calculate_flood_probability(
-                            rain_1h=rain.get("1h", 0),
-                            rain_3h=rain.get("3h", 0),
-                            humidity=main.get("humidity", 0),
-                            wind_speed=wind.get("speed", 0),
-                            clouds=clouds.get("all", 0),
-                        )
-                        payload = {
-                            "temperature": main.get("temp"),
-                            "humidity": main.get("humidity"),
-                            "wind_speed": wind.get("speed"),
-                            "rain_1h": rain.get("1h", 0),
-                            "rain_3h": rain.get("3h", 0),
-                            "clouds": clouds.get("all"),
-                            "description": d.get("weather", [{}])[0].get("description", ""),
-                            "flood_risk": flood.model_dump(),
-                            "timestamp": datetime.utcnow().isoformat(),
-                        }
-                        yield f"data: {json.dumps(payload)}\n\n"
-                    else:
-                        yield f"data: {json.dumps({'error': 'API error'})}\n\n"
-                except Exception as e:
-                    yield f"data: {json.dumps({'error': str(e)})}\n\n"
-                await asyncio.sleep(interval)
+                yield await queue.get()
+        finally:
+            channel.unsubscribe(queue)
 
     return StreamingResponse(
         event_generator(),
@@ -355,12 +771,20 @@ async def weather_stream(
     )
 
 
+@lru_cache(maxsize=4096)
+def _flood_risk_json(rain_1h, rain_3h, humidity, wind_speed, clouds) -> bytes:
+    flood = calculate_flood_probability(rain_1h, rain_3h, humidity, wind_speed, clouds)
+    return orjson.dumps(flood.model_dump())
+
+
 @app.get("/flood-risk", response_model=FloodRisk, tags=["Core"])
 async def flood_risk_calculator(
     rain_1h: float = 0, rain_3h: float = 0,
     humidity: float = 0, wind_speed: float = 0, clouds: float = 0,
 ):
-    return calculate_flood_probability(rain_1h, rain_3h, humidity, wind_speed, clouds)
+    # Pure function of its inputs: repeat calls are a cached bytes lookup
+    return Response(_flood_risk_json(rain_1h, rain_3h, humidity, wind_speed, clouds),
+                    media_type="application/json")
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -368,20 +792,20 @@ async def flood_risk_calculator(
 # ═══════════════════════════════════════════════════════════════════════════
 
 @app.get("/cities", response_model=List[CityResponse], tags=["Cities"])
-def list_cities(db: Session = Depends(get_db), _auth=Depends(require_api_key)):
-    return db.query(City).order_by(City.is_favorite.desc(), City.created_at.desc()).all()
+def list_cities(db: Session = Depends(get_db_ro), _auth=Depends(require_api_key)):
+    cities = db.query(City).order_by(City.is_favorite.desc(), City.created_at.desc(), City.id.desc()).all()
+    return _fast_json(from_rows(CityResponseS, cities))
 
 
 @app.post("/cities", response_model=CityResponse, tags=["Cities"])
 def save_city(body: CityCreate, db: Session = Depends(get_db), _auth=Depends(require_api_key)):
-    existing = db.query(City).filter(City.name == body.name, City.country == body.country).first()
+    existing = db.scalars(queries.city_by_name(body.name, body.country)).first()
     if existing:
-        return existing
+        return _fast_json(row_converter(CityResponseS)(existing))
     city = City(**body.model_dump())
     db.add(city)
     db.commit()
-    db.refresh(city)
-    return city
+    return _fast_json(row_converter(CityResponseS)(city))
 
 
 @app.delete("/cities/{city_id}", response_model=MessageResponse, tags=["Cities"])
@@ -401,8 +825,7 @@ def toggle_favorite(city_id: int, db: Session = Depends(get_db), _auth=Depends(r
         raise HTTPException(404, "City not found.")
     city.is_favorite = not city.is_favorite
     db.commit()
-    db.refresh(city)
-    return city
+    return _fast_json(row_converter(CityResponseS)(city))
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -412,23 +835,24 @@ def toggle_favorite(city_id: int, db: Session = Depends(get_db), _auth=Depends(r
 @app.get("/history", response_model=List[SearchHistoryResponse], tags=["History"])
 def get_search_history(
     limit: int = Query(default=50, le=200),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_ro),
     _auth=Depends(require_api_key),
 ):
-    return db.query(SearchHistory).order_by(SearchHistory.searched_at.desc()).limit(limit).all()
+    return _fast_json(from_rows(SearchHistoryResponseS, db.scalars(queries.recent_searches(limit))))
 
 
 @app.get("/history/weather/{city_id}", response_model=List[WeatherLogResponse], tags=["History"])
 def get_weather_history(
     city_id: int,
     limit: int = Query(default=100, le=500),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_ro),
     _auth=Depends(require_api_key),
 ):
     city = db.query(City).filter(City.id == city_id).first()
     if not city:
         raise HTTPException(404, "City not found.")
-    return db.query(WeatherLog).filter(WeatherLog.city_id == city_id).order_by(WeatherLog.recorded_at.desc()).limit(limit).all()
+    logs = db.scalars(queries.latest_logs_by_city_id(city_id, limit))
+    return _fast_json(from_rows(WeatherLogResponseS, logs))
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -436,8 +860,8 @@ def get_weather_history(
 # ═══════════════════════════════════════════════════════════════════════════
 
 @app.get("/alerts", response_model=List[AlertResponse], tags=["Alerts"])
-def list_alerts(db: Session = Depends(get_db), _auth=Depends(require_api_key)):
-    return db.query(Alert).order_by(Alert.created_at.desc()).all()
+def list_alerts(db: Session = Depends(get_db_ro), _auth=Depends(require_api_key)):
+    return _fast_json(from_rows(AlertResponseS, db.query(Alert).order_by(Alert.created_at.desc(), Alert.id.desc())))
 
 
 @app.post("/alerts", response_model=AlertResponse, tags=["Alerts"])
@@ -445,11 +869,9 @@ def create_alert(body: AlertCreate, db: Session = Depends(get_db), _auth=Depends
     city = db.query(City).filter(City.id == body.city_id).first()
     if not city:
         raise HTTPException(404, f"City ID {body.city_id} not found. Save the city first.")
-    alert = Alert(**body.model_dump())
-    db.add(alert)
+    alert, = create_returning(db, Alert, [body.model_dump()])
     db.commit()
-    db.refresh(alert)
-    return alert
+    return _fast_json(row_converter(AlertResponseS)(alert))
 
 
 @app.delete("/alerts/{alert_id}", response_model=MessageResponse, tags=["Alerts"])
@@ -464,21 +886,17 @@ def delete_alert(alert_id: int, db: Session = Depends(get_db), _auth=Depends(req
 
 @app.get("/alerts/check/{city_id}", tags=["Alerts"])
 async def check_alerts(city_id: int, db: Session = Depends(get_db), _auth=Depends(require_api_key)):
-    city = db.query(City).filter(City.id == city_id).first()
+    city = await run_in_threadpool(lambda: db.scalars(queries.CITY_BY_ID, {"cid": city_id}).first())
     if not city:
         raise HTTPException(404, "City not found.")
-    if not OWM_API_KEY:
+    if not _OWM_CONFIGURED:
         raise HTTPException(500, "OWM API key not configured.")
 
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(
-            f"{OWM_BASE}/data/2.5/weather",
-            params={"lat": city.lat, "lon": city.lon, "appid": OWM_API_KEY, "units": "metric"},
-        )
-    if resp.status_code != 200:
-        raise HTTPException(resp.status_code, "Weather API error.")
-
-    d = resp.json()
+    # OWM round trip and the alerts query overlap instead of running back to back
+    d, alerts = await asyncio.gather(
+        fetch_owm_weather(city.lat, city.lon),
+        run_in_threadpool(lambda: db.scalars(queries.active_alerts_for_city(city_id)).all()),
+    )
     flood = calculate_flood_probability(
         rain_1h=d.get("rain", {}).get("1h", 0),
         rain_3h=d.get("rain", {}).get("3h", 0),
@@ -487,16 +905,13 @@ async def check_alerts(city_id: int, db: Session = Depends(get_db), _auth=Depend
         clouds=d.get("clouds", {}).get("all", 0),
     )
 
-    alerts = db.query(Alert).filter(Alert.city_id == city_id, Alert.is_active == True).all()
     triggered = []
     for alert in alerts:
         if flood.score >= alert.threshold:
-            alert.last_triggered = datetime.utcnow()
-            alert.trigger_count += 1
             triggered.append({"alert_id": alert.id, "label": alert.label,
                                "threshold": alert.threshold, "current_score": flood.score,
                                "flood_level": flood.level})
-    db.commit()
+    await run_in_threadpool(bump_alerts, db, [t["alert_id"] for t in triggered])
 
     return {"city": city.name, "current_flood_score": flood.score,
             "flood_level": flood.level, "alerts_triggered": triggered,
@@ -507,65 +922,105 @@ async def check_alerts(city_id: int, db: Session = Depends(get_db), _auth=Depend
 # FORECAST
 # ═══════════════════════════════════════════════════════════════════════════
 
-@app.get("/forecast", response_model=ForecastResponse, tags=["Forecast"])
+# Encoded items (or columns) per cached OWM forecast and layout. Entries hold
+# the parsed dict they were built from, so a refetch misses on identity.
+forecast_body_cache = TTLCache(maxsize=4096, ttl=600)
+
+
+def _forecast_body(key, data: dict, layout: str) -> msgspec.Raw:
+    hit = forecast_body_cache.get((key, layout))
+    if hit is not None and hit[0] is data:
+        return hit[1]
+
+    slots = data.get("list", [])
+
+    # One pass fills the scoring inputs straight into preallocated arrays
+    n = len(slots)
+    rain_3h, humidity, wind_speed, clouds = (np.empty(n) for _ in range(4))
+    for i, slot in enumerate(slots):
+        rain_3h[i]    = slot.get("rain", {}).get("3h", 0)
+        humidity[i]   = slot.get("main", {}).get("humidity", 0)
+        wind_speed[i] = slot.get("wind", {}).get("speed", 0)
+        clouds[i]     = slot.get("clouds", {}).get("all", 0)
+
+    scores, levels, colors = flood_risk_columns(np.zeros(n), rain_3h, humidity, wind_speed, clouds)
+    mains   = [slot.get("main", {}) for slot in slots]
+    weather = [slot.get("weather", [{}])[0] for slot in slots]
+
+    if layout == "columns":
+        # Parallel lists straight from the arrays: no per-slot objects at all
+        body = ForecastColumnsS(
+            dt=[slot["dt"] for slot in slots],
+            datetime_str=[slot.get("dt_txt", "") for slot in slots],
+            temperature=[float(m.get("temp", 0)) for m in mains],
+            feels_like=[float(m.get("feels_like", 0)) for m in mains],
+            humidity=humidity.tolist(),
+            wind_speed=wind_speed.tolist(),
+            rain_3h=rain_3h.tolist(),
+            clouds=clouds.tolist(),
+            description=[w.get("description", "") for w in weather],
+            icon=[w.get("icon", "") for w in weather],
+            flood_score=scores,
+            flood_level=levels,
+            flood_color=colors,
+        )
+    else:
+        body = [
+            ForecastItemS(
+                dt=slot["dt"],
+                datetime_str=slot.get("dt_txt", ""),
+                temperature=float(m.get("temp", 0)),
+                feels_like=float(m.get("feels_like", 0)),
+                humidity=hum,
+                wind_speed=ws,
+                rain_3h=r3,
+                clouds=cl,
+                description=w.get("description", ""),
+                icon=w.get("icon", ""),
+                flood_risk=FloodRiskS(sc, lv, co),
+            )
+            for slot, m, w, r3, hum, ws, cl, sc, lv, co in zip(
+                slots, mains, weather, rain_3h.tolist(), humidity.tolist(),
+                wind_speed.tolist(), clouds.tolist(), scores, levels, colors,
+            )
+        ]
+
+    raw = msgspec.Raw(ENC.encode(body))
+    forecast_body_cache[(key, layout)] = (data, raw)
+    return raw
+
+
+@app.get("/forecast", response_model=Union[ForecastResponse, ForecastColumnsResponse], tags=["Forecast"])
 @limiter.limit("20/minute")
 async def get_forecast(
     request: Request,
-    lat: float,
-    lon: float,
+    lat: float = Query(ge=-90, le=90),
+    lon: float = Query(ge=-180, le=180),
+    layout: Literal["items", "columns"] = "items",
     _auth=Depends(require_api_key),
 ):
-    if not OWM_API_KEY:
+    """
+    layout=items (default): a list of ForecastItem objects.
+    layout=columns: one list per field (ForecastColumns), for chart clients.
+    """
+    if not _OWM_CONFIGURED:
         raise HTTPException(500, "OWM API key not configured.")
 
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(
-            f"{OWM_BASE}/data/2.5/forecast",
-            params={"lat": lat, "lon": lon, "appid": OWM_API_KEY, "units": "metric"},
-        )
-
-    if resp.status_code != 200:
-        raise HTTPException(resp.status_code, "Forecast API error.")
-
-    data = resp.json()
+    data = await fetch_owm_forecast(lat, lon)
     city_info = data.get("city", {})
-    items = []
-
-    for slot in data.get("list", []):
-        main = slot.get("main", {})
-        wind = slot.get("wind", {})
-        clouds = slot.get("clouds", {})
-        rain = slot.get("rain", {})
-        rain_3h = rain.get("3h", 0)
-
-        flood = calculate_flood_probability(
-            rain_1h=0, rain_3h=rain_3h,
-            humidity=main.get("humidity", 0),
-            wind_speed=wind.get("speed", 0),
-            clouds=clouds.get("all", 0),
-        )
-
-        items.append(ForecastItem(
-            dt=slot["dt"],
-            datetime_str=slot.get("dt_txt", ""),
-            temperature=main.get("temp", 0),
-            feels_like=main.get("feels_like", 0),
-            humidity=main.get("humidity", 0),
-            wind_speed=wind.get("speed", 0),
-            rain_3h=rain_3h,
-            clouds=clouds.get("all", 0),
-            description=slot.get("weather", [{}])[0].get("description", ""),
-            icon=slot.get("weather", [{}])[0].get("icon", ""),
-            flood_risk=flood,
-        ))
+    coord = city_info.get("coord", {})
+    body = _forecast_body(coord_key(lat, lon), data, layout)
 
-    return ForecastResponse(
+    # Only the small envelope is encoded per request; the body comes pre-encoded
+    envelope = dict(
         city=city_info.get("name", ""),
         country=city_info.get("country", ""),
-        lat=city_info.get("coord", {}).get("lat", lat),
-        lon=city_info.get("coord", {}).get("lon", lon),
-        items=items,
+        lat=float(coord.get("lat", lat)),
+        lon=float(coord.get("lon", lon)),
     )
+    if layout == "columns":
+        return _fast_json(ForecastColumnsResponseS(**envelope, columns=body))
+    return _fast_json(ForecastResponseS(**envelope, items=body))
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -574,18 +1029,27 @@ async def get_forecast(
 
 @app.post("/admin/api-keys", response_model=ApiKeyResponse, tags=["Admin"])
 def create_api_key(body: ApiKeyCreate, db: Session = Depends(get_db), _=Depends(require_admin)):
-    key = ApiKey(key=secrets.token_hex(32), label=body.label)
+    raw_key = secrets.token_hex(32)
+    key = ApiKey(key_hash=hash_api_key(raw_key), label=body.label)
     db.add(key)
     db.commit()
-    db.refresh(key)
-    return key
+    with _api_keys_lock:
+        app.state.api_keys[key.key_hash] = app.state.api_key_changes[key.key_hash] = ApiKeyUsage(key.id)
+    # Only the digest is stored — this response is the one chance to see the key.
+    return {"id": key.id, "key": raw_key, "label": key.label, "is_active": key.is_active,
+            "created_at": key.created_at, "call_count": key.call_count}
 
 
 @app.delete("/admin/api-keys/{key}", response_model=MessageResponse, tags=["Admin"])
 def revoke_api_key(key: str, db: Session = Depends(get_db), _=Depends(require_admin)):
-    row = db.query(ApiKey).filter(ApiKey.key == key).first()
+    row = db.query(ApiKey).filter(ApiKey.key_hash == hash_api_key(key)).first()
     if not row:
         raise HTTPException(404, "API key not found.")
+    with _api_keys_lock:
+        usage = app.state.api_keys.pop(row.key_hash, None)
+        app.state.api_key_changes[row.key_hash] = None
+    if usage and usage.calls:   # settle calls not yet flushed
+        add_api_key_usage(db, [{"kid": row.id, "delta": usage.calls, "ts": usage.last_used}])
     row.is_active = False
     db.commit()
     return {"message": "API key revoked."}
@@ -593,12 +1057,29 @@ def revoke_api_key(key: str, db: Session = Depends(get_db), _=Depends(require_ad
 
 @app.get("/admin/stats", response_model=StatsResponse, tags=["Admin"])
 def get_stats(db: Session = Depends(get_db), _=Depends(require_admin)):
-    return StatsResponse(
-        total_searches=db.query(SearchHistory).count(),
-        total_cities_saved=db.query(City).count(),
-        total_weather_logs=db.query(WeatherLog).count(),
-        total_alerts=db.query(Alert).count(),
-        high_risk_events=db.query(WeatherLog).filter(WeatherLog.flood_level == "HIGH").count(),
+    return StatsResponse(**db.execute(queries.STATS).one()._mapping)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# INTERNAL (service-to-service, MessagePack)
+# ═══════════════════════════════════════════════════════════════════════════
+
+@app.get("/internal/weather_logs.msgpack", tags=["Internal"])
+def export_weather_logs(
+    after_id: int = Query(default=0, ge=0),
+    limit: int = Query(default=1000, ge=1, le=10000),
+    db: Session = Depends(get_db_ro),
+    _=Depends(require_admin),
+):
+    """
+    Weather logs with id > after_id as a MessagePack array of
+    WeatherLogResponse maps. Page by passing the last id back as after_id;
+    decode with msgspec.msgpack.Decoder(List[WeatherLogResponseS]).
+    """
+    logs = db.scalars(queries.logs_after_id(after_id, limit))
+    return Response(
+        MSGPACK_ENC.encode(from_rows(WeatherLogResponseS, logs)),
+        media_type="application/msgpack",
     )
 
 
@@ -672,21 +1153,37 @@ HISTORICAL_FLOODS = {
 }
 
 
-def get_flood_history(city_name: str) -> list:
+# Frozen at import: the same event objects are shared by every request.
+_HF_EXACT = {
+    key: tuple(MappingProxyType(event) for event in events)
+    for key, events in HISTORICAL_FLOODS.items()
+}
+_HF_KEYS = tuple(key for key in _HF_EXACT if key != "default")
+
+
+@lru_cache(maxsize=1024)
+def _hf_partial(city_lower: str) -> tuple:
+    for key in _HF_KEYS:
+        if key in city_lower or city_lower in key:
+            return _HF_EXACT[key]
+    return _HF_EXACT["default"]
+
+
+def get_flood_history(city_name: str) -> tuple:
     city_lower = city_name.lower().strip()
-    if city_lower in HISTORICAL_FLOODS:
-        return HISTORICAL_FLOODS[city_lower]
-    for key in HISTORICAL_FLOODS:
-        if key != "default" and (key in city_lower or city_lower in key):
-            return HISTORICAL_FLOODS[key]
-    return HISTORICAL_FLOODS["default"]
+    return _HF_EXACT.get(city_lower) or _hf_partial(city_lower)
+
+
+@lru_cache(maxsize=1024)
+def _flood_history_json(city: str) -> bytes:
+    events = get_flood_history(city)
+    return orjson.dumps({"city": city, "events": [dict(e) for e in events], "count": len(events)})
 
 
 @app.get("/flood-history", tags=["Flood History"])
 async def flood_history(
-    city: str = Query(..., min_length=1),
+    city: str = Query(..., min_length=1, max_length=200),
     _auth=Depends(require_api_key),
 ):
     """Returns known historical flood events for a given city."""
-    events = get_flood_history(city)
-    return {"city": city, "events": events, "count": len(events)}
+    return Response(_flood_history_json(city), media_type="application/json")
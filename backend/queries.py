@@ -0,0 +1,77 @@
+"""
+FloodLoop — Query Catalog
+Hot-path lookups built as lambda statements: SQLAlchemy caches each one's
+compiled SQL keyed on the lambda's code, so repeat calls only bind new
+parameter values. Run with session.scalars(stmt).first() / .all().
+Newest-first orderings break timestamp ties on id, so rows written within
+one clock tick still come back in insert order, newest first.
+
+The UPPER_CASE statements are built once at import and take their values
+as bind parameters: session.execute(STMT, {"cid": ...}).
+"""
+
+from sqlalchemy import bindparam, func, lambda_stmt, select
+
+from database import City, WeatherLog, SearchHistory, Alert
+
+
+def city_by_name(name: str, country: str):
+    stmt = lambda_stmt(lambda: select(City))
+    stmt += lambda s: s.where(City.name == name, City.country == country)
+    return stmt
+
+
+def latest_logs_by_city_id(city_id: int, limit: int):
+    stmt = lambda_stmt(lambda: select(WeatherLog))
+    stmt += lambda s: s.where(WeatherLog.city_id == city_id)
+    stmt += lambda s: s.order_by(WeatherLog.recorded_at.desc(), WeatherLog.id.desc()).limit(limit)
+    return stmt
+
+
+def active_alerts_for_city(city_id: int):
+    stmt = lambda_stmt(lambda: select(Alert))
+    stmt += lambda s: s.where(Alert.city_id == city_id, Alert.is_active == True)
+    return stmt
+
+
+def recent_searches(limit: int):
+    stmt = lambda_stmt(lambda: select(SearchHistory))
+    stmt += lambda s: s.order_by(SearchHistory.searched_at.desc(), SearchHistory.id.desc()).limit(limit)
+    return stmt
+
+
+def logs_after_id(after_id: int, limit: int):
+    """Keyset page over every city's weather log, oldest first (PK-ordered)."""
+    stmt = lambda_stmt(lambda: select(WeatherLog))
+    stmt += lambda s: s.where(WeatherLog.id > after_id)
+    stmt += lambda s: s.order_by(WeatherLog.id).limit(limit)
+    return stmt
+
+
+# ─── Prebuilt Statements ───────────────────────────────────────────────────
+
+CITY_BY_ID = select(City).where(City.id == bindparam("cid"))
+
+# Which of these ids still exist
+CITY_IDS_IN = select(City.id).where(City.id.in_(bindparam("ids", expanding=True)))
+
+# Active alerts on a city whose threshold the given score meets
+FIRED_ALERT_IDS = select(Alert.id).where(
+    Alert.city_id == bindparam("cid"),
+    Alert.is_active == True,
+    Alert.threshold <= bindparam("score"),
+)
+
+
+def _count(model, *where):
+    return select(func.count()).select_from(model).where(*where).scalar_subquery()
+
+
+# All dashboard counters in one round trip
+STATS = select(
+    _count(SearchHistory).label("total_searches"),
+    _count(City).label("total_cities_saved"),
+    _count(WeatherLog).label("total_weather_logs"),
+    _count(Alert).label("total_alerts"),
+    _count(WeatherLog, WeatherLog.flood_level == "HIGH").label("high_risk_events"),
+)
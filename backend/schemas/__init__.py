@@ -0,0 +1,58 @@
+"""
+FloodLoop — Pydantic Schemas
+Request bodies and response models for all API routes, one module per route
+group. Names resolve lazily: `from schemas import CityResponse` only imports
+schemas/city.py and what it depends on. Response-only models also set
+defer_build, so their core schema is built on first use, not at import.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+_EXPORTS = {
+    "RiskLevel":               "risk",
+    "FloodRisk":               "risk",
+    "FLOOD_RISK_ADAPTER":      "risk",
+    "WeatherResponse":         "weather",
+    "GeoResponse":             "weather",
+    "CityCreate":              "city",
+    "CityResponse":            "city",
+    "WeatherLogResponse":      "history",
+    "SearchHistoryResponse":   "history",
+    "AlertCreate":             "alert",
+    "AlertResponse":           "alert",
+    "ForecastItem":            "forecast",
+    "ForecastResponse":        "forecast",
+    "ForecastColumns":         "forecast",
+    "ForecastColumnsResponse": "forecast",
+    "ApiKeyCreate":            "admin",
+    "ApiKeyResponse":          "admin",
+    "StatsResponse":           "admin",
+    "MessageResponse":         "common",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value   # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return __all__
+
+
+if TYPE_CHECKING:
+    from .risk import RiskLevel, FloodRisk, FLOOD_RISK_ADAPTER
+    from .weather import WeatherResponse, GeoResponse
+    from .city import CityCreate, CityResponse
+    from .history import WeatherLogResponse, SearchHistoryResponse
+    from .alert import AlertCreate, AlertResponse
+    from .forecast import ForecastItem, ForecastResponse, ForecastColumns, ForecastColumnsResponse
+    from .admin import ApiKeyCreate, ApiKeyResponse, StatsResponse
+    from .common import MessageResponse
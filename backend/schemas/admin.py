@@ -0,0 +1,36 @@
+"""
+FloodLoop — Admin Schemas
+API keys and dashboard stats.
+"""
+
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict
+
+
+# ─── API Key ───────────────────────────────────────────────────────────────
+
+class ApiKeyCreate(BaseModel):
+    label: str = "default"
+
+
+class ApiKeyResponse(BaseModel):
+    id: int
+    key: str   # plaintext, only ever returned by the create call
+    label: str
+    is_active: bool
+    created_at: datetime
+    call_count: int
+
+    model_config = ConfigDict(from_attributes=True, frozen=True, strict=True, defer_build=True)
+
+
+# ─── Stats ─────────────────────────────────────────────────────────────────
+
+class StatsResponse(BaseModel):
+    total_searches: int
+    total_cities_saved: int
+    total_weather_logs: int
+    total_alerts: int
+    high_risk_events: int
+
+    model_config = ConfigDict(frozen=True, strict=True, defer_build=True)
@@ -0,0 +1,29 @@
+"""
+FloodLoop — Alert Schemas
+Flood alert bodies and responses.
+"""
+
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+
+# ─── Alert ─────────────────────────────────────────────────────────────────
+
+class AlertCreate(BaseModel):
+    city_id: int
+    threshold: float = Field(..., ge=0, le=100)
+    label: str = ""
+
+
+class AlertResponse(BaseModel):
+    id: int
+    city_id: int
+    threshold: float
+    label: str
+    is_active: bool
+    created_at: datetime
+    last_triggered: Optional[datetime]
+    trigger_count: int
+
+    model_config = ConfigDict(from_attributes=True, frozen=True, strict=True, defer_build=True)
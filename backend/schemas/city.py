@@ -0,0 +1,31 @@
+"""
+FloodLoop — City Schemas
+Saved-city bodies and responses.
+"""
+
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict
+
+
+# ─── City ──────────────────────────────────────────────────────────────────
+
+class CityCreate(BaseModel):
+    name: str
+    country: str
+    state: str = ""
+    lat: float
+    lon: float
+    is_favorite: bool = False
+
+
+class CityResponse(BaseModel):
+    id: int
+    name: str
+    country: str
+    state: str
+    lat: float
+    lon: float
+    is_favorite: bool
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True, frozen=True, strict=True, defer_build=True)
@@ -0,0 +1,15 @@
+"""
+FloodLoop — Common Schemas
+Response shapes shared across route groups.
+"""
+
+from pydantic import BaseModel, ConfigDict
+
+
+# ─── Generic ───────────────────────────────────────────────────────────────
+
+class MessageResponse(BaseModel):
+    message: str
+
+    model_config = ConfigDict(frozen=True, strict=True, defer_build=True)
+
@@ -0,0 +1,72 @@
+"""
+FloodLoop — Forecast Schemas
+5-day / 3-hour forecast responses, per item or as columns.
+"""
+
+from typing import List
+from pydantic import BaseModel, ConfigDict, StrictFloat, StrictInt, StrictStr
+from pydantic.dataclasses import dataclass
+
+from .risk import FloodRisk, RiskLevel
+
+
+# ─── Forecast ──────────────────────────────────────────────────────────────
+
+# Up to 40 per response: a slotted dataclass is lighter to build than a model.
+# Strictness is per field: a strict dataclass would reject the dicts FastAPI
+# re-validates a dumped ForecastResponse from.
+@dataclass(slots=True, frozen=True, config=ConfigDict(defer_build=True))
+class ForecastItem:
+    dt: StrictInt
+    datetime_str: StrictStr
+    temperature: StrictFloat
+    feels_like: StrictFloat
+    humidity: StrictFloat
+    wind_speed: StrictFloat
+    rain_3h: StrictFloat
+    clouds: StrictFloat
+    description: StrictStr
+    icon: StrictStr
+    flood_risk: FloodRisk
+
+
+class ForecastResponse(BaseModel):
+    city: str
+    country: str
+    lat: float
+    lon: float
+    items: List[ForecastItem]
+
+    model_config = ConfigDict(frozen=True, strict=True, defer_build=True)
+
+
+# ─── Forecast (columns) ────────────────────────────────────────────────────
+# layout=columns: one list per ForecastItem field, index i across the lists
+# being slot i. flood_risk is flattened into its three fields.
+
+class ForecastColumns(BaseModel):
+    dt: List[int]
+    datetime_str: List[str]
+    temperature: List[float]
+    feels_like: List[float]
+    humidity: List[float]
+    wind_speed: List[float]
+    rain_3h: List[float]
+    clouds: List[float]
+    description: List[str]
+    icon: List[str]
+    flood_score: List[float]
+    flood_level: List[RiskLevel]
+    flood_color: List[str]
+
+    model_config = ConfigDict(frozen=True, strict=True, defer_build=True)
+
+
+class ForecastColumnsResponse(BaseModel):
+    city: str
+    country: str
+    lat: float
+    lon: float
+    columns: ForecastColumns
+
+    model_config = ConfigDict(frozen=True, strict=True, defer_build=True)
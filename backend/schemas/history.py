@@ -0,0 +1,43 @@
+"""
+FloodLoop — History Schemas
+Search history and stored weather snapshots.
+"""
+
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, ConfigDict
+
+from .risk import RiskLevel
+
+
+# ─── Weather Log ───────────────────────────────────────────────────────────
+
+class WeatherLogResponse(BaseModel):
+    id: int
+    city_id: int
+    recorded_at: datetime
+    temperature: Optional[float]
+    humidity: Optional[float]
+    wind_speed: Optional[float]
+    rain_1h: float
+    rain_3h: float
+    clouds: Optional[float]
+    description: str
+    flood_score: Optional[float]
+    flood_level: Optional[RiskLevel]
+
+    model_config = ConfigDict(from_attributes=True, frozen=True, strict=True, defer_build=True)
+
+
+# ─── Search History ────────────────────────────────────────────────────────
+
+class SearchHistoryResponse(BaseModel):
+    id: int
+    query: str
+    resolved_to: Optional[str]
+    lat: Optional[float]
+    lon: Optional[float]
+    searched_at: datetime
+    success: bool
+
+    model_config = ConfigDict(from_attributes=True, frozen=True, strict=True, defer_build=True)
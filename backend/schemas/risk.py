@@ -0,0 +1,24 @@
+"""
+FloodLoop — Flood Risk Schema
+The risk score embedded in weather and forecast responses.
+"""
+
+from typing import Literal
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+
+
+# ─── Flood Risk ────────────────────────────────────────────────────────────
+
+RiskLevel = Literal["LOW", "MEDIUM", "HIGH"]
+
+
+class FloodRisk(BaseModel):
+    score: float
+    level: RiskLevel
+    color: str
+
+    model_config = ConfigDict(frozen=True, strict=True)
+
+
+# One validator for every dict -> FloodRisk conversion, built at import
+FLOOD_RISK_ADAPTER = TypeAdapter(FloodRisk)
@@ -0,0 +1,42 @@
+"""
+FloodLoop — Core Schemas
+Current weather and geocoding responses.
+"""
+
+from typing import Optional
+from pydantic import BaseModel, ConfigDict
+
+from .risk import FloodRisk
+
+
+# ─── Weather ───────────────────────────────────────────────────────────────
+
+class WeatherResponse(BaseModel):
+    city: str
+    temperature: Optional[float]
+    feels_like: Optional[float]
+    humidity: Optional[float]
+    pressure: Optional[float]
+    wind_speed: Optional[float]
+    wind_deg: Optional[float]
+    clouds: Optional[float]
+    rain_1h: float
+    rain_3h: float
+    description: str
+    icon: str
+    visibility: Optional[int]
+    flood_risk: FloodRisk
+
+    model_config = ConfigDict(frozen=True, strict=True, defer_build=True)
+
+
+# ─── Geocoding ─────────────────────────────────────────────────────────────
+
+class GeoResponse(BaseModel):
+    name: str
+    country: str
+    state: str
+    lat: float
+    lon: float
+
+    model_config = ConfigDict(frozen=True, strict=True, defer_build=True)
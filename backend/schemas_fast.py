@@ -1,24 +1,55 @@
 """
-FloodLoop — Pydantic Schemas
-Request bodies and response models for all API routes.
+FloodLoop — msgspec Response Structs
+Mirrors of the response models in schemas/ for the hot read paths. Routes
+build these from data they already trust and encode them with ENC, so no
+Pydantic validation or dump runs. The Pydantic models stay the source of
+truth for request bodies and the OpenAPI docs.
 """
 
 from datetime import datetime
-from typing import Optional, List
-from pydantic import BaseModel, Field
+from functools import lru_cache
+from typing import Optional, List, Union
+
+import msgspec
+
+ENC = msgspec.json.Encoder()
+MSGPACK_ENC = msgspec.msgpack.Encoder()   # internal service-to-service routes
+
+
+@lru_cache(maxsize=None)
+def row_converter(cls):
+    """
+    Compiled ORM row -> Struct function for cls, generated once per class:
+    the attribute reads are written out and passed positionally, so a row
+    costs no getattr loop or temporary list. Non-optional float fields go
+    through float(): SQLite's INSERT … RETURNING hands whole REALs back as
+    ints, and the wire should still say 10.0.
+    """
+    args = ", ".join(
+        f"float(o.{f.name})" if f.type is float else f"o.{f.name}"
+        for f in msgspec.structs.fields(cls)
+    )
+    ns = {"cls": cls}
+    exec(f"def {cls.__name__}_from_row(o):\n    return cls({args})", ns)
+    return ns[f"{cls.__name__}_from_row"]
+
+
+def from_rows(cls, rows) -> list:
+    """Structs for a whole result set; map() keeps the per-row loop in C."""
+    return list(map(row_converter(cls), rows))
 
 
 # ─── Flood Risk ────────────────────────────────────────────────────────────
 
-class FloodRisk(BaseModel):
+class FloodRiskS(msgspec.Struct, frozen=True):
     score: float
-    level: str   # LOW | MEDIUM | HIGH
+    level: str
     color: str
 
 
 # ─── Weather ───────────────────────────────────────────────────────────────
 
-class WeatherResponse(BaseModel):
+class WeatherResponseS(msgspec.Struct, frozen=True):
     city: str
     temperature: Optional[float]
     feels_like: Optional[float]
@@ -32,31 +63,12 @@ class WeatherResponse(BaseModel):
     description: str
     icon: str
     visibility: Optional[int]
-    flood_risk: FloodRisk
-
-
-# ─── Geocoding ─────────────────────────────────────────────────────────────
-
-class GeoResponse(BaseModel):
-    name: str
-    country: str
-    state: str
-    lat: float
-    lon: float
+    flood_risk: FloodRiskS
 
 
 # ─── City ──────────────────────────────────────────────────────────────────
 
-class CityCreate(BaseModel):
-    name: str
-    country: str
-    state: str = ""
-    lat: float
-    lon: float
-    is_favorite: bool = False
-
-
-class CityResponse(BaseModel):
+class CityResponseS(msgspec.Struct, frozen=True):
     id: int
     name: str
     country: str
@@ -66,13 +78,10 @@ class CityResponse(BaseModel):
     is_favorite: bool
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 # ─── Weather Log ───────────────────────────────────────────────────────────
 
-class WeatherLogResponse(BaseModel):
+class WeatherLogResponseS(msgspec.Struct, frozen=True):
     id: int
     city_id: int
     recorded_at: datetime
@@ -86,13 +95,10 @@ class WeatherLogResponse(BaseModel):
     flood_score: Optional[float]
     flood_level: Optional[str]
 
-    class Config:
-        from_attributes = True
-
 
 # ─── Search History ────────────────────────────────────────────────────────
 
-class SearchHistoryResponse(BaseModel):
+class SearchHistoryResponseS(msgspec.Struct, frozen=True):
     id: int
     query: str
     resolved_to: Optional[str]
@@ -101,19 +107,10 @@ class SearchHistoryResponse(BaseModel):
     searched_at: datetime
     success: bool
 
-    class Config:
-        from_attributes = True
-
 
 # ─── Alert ─────────────────────────────────────────────────────────────────
 
-class AlertCreate(BaseModel):
-    city_id: int
-    threshold: float = Field(..., ge=0, le=100)
-    label: str = ""
-
-
-class AlertResponse(BaseModel):
+class AlertResponseS(msgspec.Struct, frozen=True):
     id: int
     city_id: int
     threshold: float
@@ -123,13 +120,10 @@ class AlertResponse(BaseModel):
     last_triggered: Optional[datetime]
     trigger_count: int
 
-    class Config:
-        from_attributes = True
-
 
 # ─── Forecast ──────────────────────────────────────────────────────────────
 
-class ForecastItem(BaseModel):
+class ForecastItemS(msgspec.Struct, frozen=True):
     dt: int
     datetime_str: str
     temperature: float
@@ -140,43 +134,36 @@ class ForecastItem(BaseModel):
     clouds: float
     description: str
     icon: str
-    flood_risk: FloodRisk
+    flood_risk: FloodRiskS
 
 
-class ForecastResponse(BaseModel):
+class ForecastResponseS(msgspec.Struct, frozen=True):
     city: str
     country: str
     lat: float
     lon: float
-    items: List[ForecastItem]
-
-
-# ─── API Key ───────────────────────────────────────────────────────────────
-
-class ApiKeyCreate(BaseModel):
-    label: str = "default"
-
-
-class ApiKeyResponse(BaseModel):
-    id: int
-    key: str
-    label: str
-    is_active: bool
-    created_at: datetime
-    call_count: int
-
-    class Config:
-        from_attributes = True
-
-
-# ─── Generic ───────────────────────────────────────────────────────────────
-
-class MessageResponse(BaseModel):
-    message: str
-
-class StatsResponse(BaseModel):
-    total_searches: int
-    total_cities_saved: int
-    total_weather_logs: int
-    total_alerts: int
-    high_risk_events: int
+    items: Union[List[ForecastItemS], msgspec.Raw]   # Raw: items already encoded
+
+
+class ForecastColumnsS(msgspec.Struct, frozen=True):
+    dt: List[int]
+    datetime_str: List[str]
+    temperature: List[float]
+    feels_like: List[float]
+    humidity: List[float]
+    wind_speed: List[float]
+    rain_3h: List[float]
+    clouds: List[float]
+    description: List[str]
+    icon: List[str]
+    flood_score: List[float]
+    flood_level: List[str]
+    flood_color: List[str]
+
+
+class ForecastColumnsResponseS(msgspec.Struct, frozen=True):
+    city: str
+    country: str
+    lat: float
+    lon: float
+    columns: Union[ForecastColumnsS, msgspec.Raw]   # Raw: columns already encoded